@@ -0,0 +1,143 @@
+import time
+import asyncio
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+
+# === DEFAULTS ===
+MAX_CONCURRENT = 8       # /ask requests served at once (global)
+MAX_PER_USER = 2         # in-flight + queued requests per user
+MAX_QUEUE = 32           # requests allowed to wait for a slot
+QUEUE_TIMEOUT = 20.0     # seconds a request may wait before it is dropped
+RETRY_AFTER = 5          # seconds suggested to shed clients
+SERVICE_TIME_ALPHA = 0.2 # EWMA weight for the observed service time
+
+
+class Busy(Exception):
+    """Raised when a request is shed; ``reason`` is one of the shed counter keys."""
+
+    def __init__(self, reason, retry_after=RETRY_AFTER):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Global and per-user concurrency limits with a bounded, deadline-aware wait queue.
+
+    Runs on the event loop only (no locks needed). Requests beyond
+    ``max_concurrent`` wait FIFO for a slot; they are shed immediately when
+    the queue is full, when the user already has ``max_per_user`` requests
+    outstanding, or when the expected wait (from the observed service time)
+    already exceeds ``queue_timeout``. Waiters still queued at their deadline
+    are dropped.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_per_user=MAX_PER_USER,
+                 max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._per_user = Counter()
+        self._waiters = deque()
+        self._service_time = None
+
+        self.admitted = 0
+        self.completed = 0
+        self.shed = Counter()
+
+    def _expected_wait(self):
+        if self._service_time is None:
+            return 0.0
+        ahead = len(self._waiters) + 1
+        return ahead * self._service_time / self.max_concurrent
+
+    def _shed(self, reason):
+        self.shed[reason] += 1
+        raise Busy(reason)
+
+    def _hand_off(self):
+        """Give a freed slot to the oldest live waiter, or return it to the pool."""
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)  # slot transferred; _active unchanged
+                return
+        self._active -= 1
+
+    async def _acquire(self, user):
+        if self._per_user[user] >= self.max_per_user:
+            self._shed("per_user")
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._per_user[user] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+        if self._expected_wait() > self.queue_timeout:
+            self._shed("deadline")
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._per_user[user] += 1
+        try:
+            await asyncio.wait_for(fut, timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            self._drop_user(user)
+            if fut.done() and not fut.cancelled():
+                self._hand_off()  # slot arrived as we gave up; pass it on
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._shed("timeout")
+
+    def _drop_user(self, user):
+        self._per_user[user] -= 1
+        if self._per_user[user] <= 0:
+            del self._per_user[user]
+
+    def _release(self, user, started):
+        elapsed = time.monotonic() - started
+        if self._service_time is None:
+            self._service_time = elapsed
+        else:
+            self._service_time += SERVICE_TIME_ALPHA * (elapsed - self._service_time)
+        self._drop_user(user)
+        self.completed += 1
+        self._hand_off()
+
+    @asynccontextmanager
+    async def slot(self, user):
+        """``async with controller.slot(user):`` — raises Busy if the request is shed."""
+        await self._acquire(user)
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(user, started)
+
+    def record_shed(self, reason):
+        """Count a request dropped after admission (e.g. the client disconnected)."""
+        self.shed[reason] += 1
+
+    def stats(self):
+        return {
+            "active": self._active,
+            "queued": sum(1 for f in self._waiters if not f.done()),
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "avg_service_seconds": round(self._service_time, 3) if self._service_time is not None else None,
+        }
@@ -0,0 +1,307 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import multiprocessing as mp
+from collections import Counter
+from datetime import datetime
+
+# Folders benchmarked by default; extraction.PDF_DIR is added when it exists
+DEFAULT_PDF_DIRS = ["./ico_pdfs"]
+REPORT_DIR = "./bench_reports"
+REFERENCE_METHOD = "pymupdf"
+DEFAULT_OCR_DPIS = [200]
+SLOWDOWN_THRESHOLD = 0.20  # flag methods >20% slower than the baseline report
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size in MB of this process, or with RUSAGE_CHILDREN its largest finished subprocess."""
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _extract_repaired(path):
+    """pikepdf repair followed by PyMuPDF, mirroring step 2 of process_pdf_file."""
+    import extraction
+
+    repaired = extraction.repair_pdf_with_pikepdf(path)
+    if not repaired:
+        return ""
+    try:
+        return extraction.extract_with_pymupdf(repaired)
+    finally:
+        if os.path.exists(repaired):
+            try:
+                os.remove(repaired)
+            except Exception:
+                pass
+
+
+def _method_fn(method):
+    """Resolve a method name (e.g. 'pymupdf', 'ocr@150') to a callable(path) -> text."""
+    import extraction
+
+    if method == "pymupdf":
+        return extraction.extract_with_pymupdf
+    if method == "pikepdf+pymupdf":
+        return _extract_repaired
+    if method == "pdfminer":
+        return extraction.extract_with_pdfminer
+    if method.startswith("ocr@"):
+        dpi = int(method.split("@", 1)[1])
+        return lambda path: extraction.ocr_pdf(path, dpi=dpi)
+    raise ValueError(f"Unknown extraction method: {method}")
+
+
+def _run_method(method, pdf_paths, conn):
+    """Child process entry point: run one method over every file and report back."""
+    fn = _method_fn(method)
+    rss_before = _peak_rss_mb()
+    files = []
+    for path in pdf_paths:
+        start = time.perf_counter()
+        try:
+            text = fn(path) or ""
+        except Exception:
+            text = ""
+        elapsed = time.perf_counter() - start
+        files.append({"path": path, "seconds": elapsed, "text": text})
+    # OCR renders pages in pdftoppm subprocesses, whose memory RUSAGE_SELF doesn't see
+    subprocess_rss = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    conn.send({
+        "method": method,
+        "files": files,
+        "peak_rss_mb": max(_peak_rss_mb(), subprocess_rss),
+        "import_rss_mb": rss_before,
+        "subprocess_rss_mb": subprocess_rss,
+    })
+    conn.close()
+
+
+def run_method_isolated(method, pdf_paths):
+    """Run a method in a fresh spawned process so peak RSS is attributable to it alone."""
+    ctx = mp.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_method, args=(method, pdf_paths, child_conn))
+    proc.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        # child died before reporting (segfault in a native library, OOM kill, ...)
+        proc.join()
+        return {
+            "method": method,
+            "files": [{"path": path, "seconds": 0.0, "text": ""} for path in pdf_paths],
+            "peak_rss_mb": 0.0,
+            "import_rss_mb": 0.0,
+            "subprocess_rss_mb": 0.0,
+            "error": f"child process exited with code {proc.exitcode}",
+        }
+    proc.join()
+    return result
+
+
+def count_pages(path):
+    """Page count via PyMuPDF, 0 if the file cannot be opened."""
+    try:
+        import fitz
+
+        with fitz.open(path) as doc:
+            return doc.page_count
+    except Exception:
+        return 0
+
+
+def _tokens(text):
+    return Counter(text.lower().split())
+
+
+def token_agreement(text, reference):
+    """Multiset token F1 between two extractions (1.0 = identical bag of words)."""
+    a, b = _tokens(text), _tokens(reference)
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    overlap = sum((a & b).values())
+    precision = overlap / sum(a.values())
+    recall = overlap / sum(b.values())
+    if precision + recall == 0:
+        return 0.0
+    return 2 * precision * recall / (precision + recall)
+
+
+def collect_pdfs(dirs):
+    pdf_paths = []
+    for d in dirs:
+        if not os.path.isdir(d):
+            print(f"⚠️ Skipping missing folder: {d}")
+            continue
+        for filename in sorted(os.listdir(d)):
+            if filename.lower().endswith(".pdf"):
+                pdf_paths.append(os.path.join(d, filename))
+    return pdf_paths
+
+
+def summarise(raw_results, pages):
+    """Turn per-method raw results into the comparison rows written to the report."""
+    reference = next((r for r in raw_results if r["method"] == REFERENCE_METHOD), None)
+    ref_texts = {f["path"]: f["text"] for f in reference["files"]} if reference else {}
+
+    rows = []
+    for result in raw_results:
+        ok_files = [f for f in result["files"] if f["text"].strip()]
+        total_seconds = sum(f["seconds"] for f in result["files"])
+        total_pages = sum(pages[f["path"]] for f in result["files"])
+        agreements = [
+            token_agreement(f["text"], ref_texts[f["path"]])
+            for f in result["files"]
+            if ref_texts.get(f["path"], "").strip()
+        ]
+        rows.append({
+            "method": result["method"],
+            "files": len(result["files"]),
+            "files_ok": len(ok_files),
+            "pages": total_pages,
+            "seconds": round(total_seconds, 3),
+            "pages_per_sec": round(total_pages / total_seconds, 2) if total_seconds else 0.0,
+            "peak_rss_mb": round(result["peak_rss_mb"], 1),
+            "extract_rss_mb": round(result["peak_rss_mb"] - result["import_rss_mb"], 1),
+            "subprocess_rss_mb": round(result.get("subprocess_rss_mb", 0.0), 1),
+            "output_chars": sum(len(f["text"]) for f in result["files"]),
+            "agreement_vs_reference": round(sum(agreements) / len(agreements), 4) if agreements else None,
+            "error": result.get("error"),
+            "per_file": [
+                {
+                    "path": f["path"],
+                    "pages": pages[f["path"]],
+                    "seconds": round(f["seconds"], 4),
+                    "chars": len(f["text"]),
+                }
+                for f in result["files"]
+            ],
+        })
+    return rows
+
+
+def compare_with_baseline(rows, baseline_path):
+    """Return warnings for methods whose throughput dropped versus a previous report."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["method"]: r for r in json.load(f)["methods"]}
+    warnings = []
+    for row in rows:
+        old = baseline.get(row["method"])
+        if not old or not old.get("pages_per_sec"):
+            continue
+        if row.get("error"):
+            warnings.append(f"{row['method']}: failed ({row['error']})")
+            continue
+        change = (row["pages_per_sec"] - old["pages_per_sec"]) / old["pages_per_sec"]
+        if change < -SLOWDOWN_THRESHOLD:
+            warnings.append(
+                f"{row['method']}: {old['pages_per_sec']} -> {row['pages_per_sec']} pages/sec ({change:+.0%})"
+            )
+    return warnings
+
+
+def render_markdown(report):
+    lines = [
+        f"# Extraction benchmark — {report['created']}",
+        "",
+        f"Folders: {', '.join(report['dirs'])}  ",
+        f"Files: {report['files']}, pages: {report['pages']}, reference method: `{REFERENCE_METHOD}`  ",
+        "Peak RSS is the larger of the method's process and its biggest subprocess (e.g. pdftoppm for OCR).",
+        "",
+        "| method | files ok | pages/sec | seconds | peak RSS MB | extract RSS MB | chars | agreement |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for r in report["methods"]:
+        agreement = "-" if r["agreement_vs_reference"] is None else f"{r['agreement_vs_reference']:.3f}"
+        method = f"{r['method']} (failed)" if r.get("error") else r["method"]
+        lines.append(
+            f"| {method} | {r['files_ok']}/{r['files']} | {r['pages_per_sec']} | {r['seconds']} "
+            f"| {r['peak_rss_mb']} | {r['extract_rss_mb']} | {r['output_chars']} | {agreement} |"
+        )
+    failed = [r for r in report["methods"] if r.get("error")]
+    if failed:
+        lines += ["", "## Failed methods", ""]
+        lines += [f"- {r['method']}: {r['error']}" for r in failed]
+    if report.get("regressions"):
+        lines += ["", "## Slowdowns vs baseline", ""]
+        lines += [f"- {w}" for w in report["regressions"]]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF extraction methods in extraction.py")
+    parser.add_argument("--dir", action="append", default=[], help="extra PDF folder to include (repeatable)")
+    parser.add_argument("--methods", nargs="+", default=["pymupdf", "pikepdf+pymupdf", "pdfminer", "ocr"],
+                        help="methods to run; 'ocr' expands to one run per --ocr-dpi")
+    parser.add_argument("--ocr-dpi", nargs="+", type=int, default=DEFAULT_OCR_DPIS)
+    parser.add_argument("--baseline", help="previous JSON report to check for slowdowns")
+    parser.add_argument("--out", default=REPORT_DIR)
+    args = parser.parse_args()
+
+    import extraction
+
+    dirs = list(DEFAULT_PDF_DIRS)
+    if os.path.isdir(extraction.PDF_DIR):
+        dirs.append(extraction.PDF_DIR)
+    dirs += args.dir
+
+    pdf_paths = collect_pdfs(dirs)
+    if not pdf_paths:
+        print("❌ No PDFs found to benchmark.")
+        return
+    pages = {p: count_pages(p) for p in pdf_paths}
+    print(f"📄 Benchmarking {len(pdf_paths)} PDFs ({sum(pages.values())} pages).")
+
+    methods = []
+    for m in args.methods:
+        if m == "ocr":
+            methods += [f"ocr@{dpi}" for dpi in args.ocr_dpi]
+        else:
+            methods.append(m)
+
+    raw_results = []
+    for method in methods:
+        print(f"⏱️ Running {method}...")
+        result = run_method_isolated(method, pdf_paths)
+        if result.get("error"):
+            print(f"❌ {method} failed: {result['error']}")
+        raw_results.append(result)
+
+    rows = summarise(raw_results, pages)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "dirs": dirs,
+        "files": len(pdf_paths),
+        "pages": sum(pages.values()),
+        "methods": rows,
+        "regressions": compare_with_baseline(rows, args.baseline) if args.baseline else [],
+    }
+
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    json_path = os.path.join(args.out, f"extraction_{stamp}.json")
+    md_path = os.path.join(args.out, f"extraction_{stamp}.md")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    markdown = render_markdown(report)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(markdown)
+
+    print(markdown)
+    print(f"✅ Report written to {json_path} and {md_path}")
+    if report["regressions"]:
+        print("⚠️ Slowdowns detected versus baseline — see report.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import argparse
+import itertools
+from datetime import datetime
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import (
+    Distance, VectorParams, HnswConfigDiff, OptimizersConfigDiff, PointStruct, SearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, QuantizationSearchParams, CollectionStatus,
+)
+
+import embed
+
+# === CONFIG ===
+LOCAL_QDRANT_URL = "http://localhost:6333"   # e.g. docker run -p 6333:6333 qdrant/qdrant
+BENCH_COLLECTION = "bench_vdpo_documents"
+REPORT_DIR = "./bench_reports"
+TOP_K = 5                                    # same as /ask
+DEFAULT_M = [8, 16, 32]
+DEFAULT_EF_CONSTRUCT = [64, 100, 200]
+DEFAULT_EF = [16, 32, 64, 128]
+DEFAULT_QUANTIZATION = ["none", "scalar"]
+DEFAULT_CHUNK_SIZES = [embed.CHUNK_SIZE]
+INDEX_WAIT_TIMEOUT = 600
+UPLOAD_BATCH = 256
+
+# Used when no --queries file is given
+DEFAULT_QUERIES = [
+    "What must a controller do after a personal data breach?",
+    "When is consent valid under the GDPR?",
+    "Can an employer monitor employees at work?",
+    "What is a data protection impact assessment and when is one required?",
+    "Rules for sending direct marketing emails and texts",
+    "What does consent or pay mean for cookie walls?",
+    "How long can personal data be retained?",
+    "What are the rights of data subjects to access their data?",
+    "When can personal data be transferred outside the UK or EU?",
+    "What are the obligations of a data processor?",
+    "Legitimate interests as a lawful basis for processing",
+    "Journalism exemption in data protection law",
+    "Children's data and age appropriate design",
+    "Security of processing and appropriate technical measures",
+    "Role and tasks of the data protection officer",
+    "Cookie consent banners and non-essential cookies",
+    "Fines and enforcement powers of the supervisory authority",
+    "Sharing driver data with third parties",
+    "Automated decision making and profiling",
+    "Special category data such as health information",
+]
+
+
+def load_queries(path):
+    if not path:
+        return DEFAULT_QUERIES
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def build_corpus(documents, chunk_size, max_chunks=None):
+    splitter = embed.make_splitter(chunk_size=chunk_size, chunk_overlap=chunk_size // 10)
+    chunks = []
+    for doc in documents:
+        chunks.extend(embed.chunk_document(doc, splitter))
+    if max_chunks:
+        chunks = chunks[:max_chunks]
+    return chunks
+
+
+def normalise(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def exact_top_k(doc_vectors, query_vectors, k):
+    """Brute-force cosine top-k (ground truth); returns an array of chunk indices per query."""
+    scores = normalise(query_vectors) @ normalise(doc_vectors).T
+    top = np.argpartition(-scores, kth=min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def estimate_index_mb(n, dim, m, quantization):
+    """Rough RAM estimate: float32 vectors + int8 copy if quantized + HNSW level-0 links (2*m x 4 bytes)."""
+    vectors = n * dim * 4
+    quantized = n * dim if quantization == "scalar" else 0
+    links = n * 2 * m * 4
+    return round((vectors + quantized + links) / (1024 * 1024), 2)
+
+
+def wait_for_index(client, n, timeout=INDEX_WAIT_TIMEOUT):
+    """Block until the optimizer has finished building HNSW over every point."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(BENCH_COLLECTION)
+        indexed = info.indexed_vectors_count or 0
+        if info.status == CollectionStatus.GREEN and indexed >= n:
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def build_collection(client, vectors, m, ef_construct, quantization):
+    if client.collection_exists(BENCH_COLLECTION):
+        client.delete_collection(BENCH_COLLECTION)
+    client.create_collection(
+        collection_name=BENCH_COLLECTION,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE),
+        # tiny thresholds so HNSW is built and used even for a small corpus
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct, full_scan_threshold=10),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=10),
+        quantization_config=(
+            ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True))
+            if quantization == "scalar" else None
+        ),
+    )
+    start = time.perf_counter()
+    for i in range(0, len(vectors), UPLOAD_BATCH):
+        client.upsert(
+            collection_name=BENCH_COLLECTION,
+            points=[
+                PointStruct(id=j, vector=vectors[j].tolist())
+                for j in range(i, min(i + UPLOAD_BATCH, len(vectors)))
+            ],
+            wait=True,
+        )
+    indexed = wait_for_index(client, len(vectors))
+    return time.perf_counter() - start, indexed
+
+
+def run_queries(client, query_vectors, truth, k, ef, quantization):
+    latencies, recalls = [], []
+    params = SearchParams(
+        hnsw_ef=ef,
+        exact=False,
+        quantization=QuantizationSearchParams(rescore=True) if quantization == "scalar" else None,
+    )
+    for qv, expected in zip(query_vectors, truth):
+        start = time.perf_counter()
+        response = client.query_points(
+            collection_name=BENCH_COLLECTION,
+            query=qv.tolist(),
+            limit=k,
+            search_params=params,
+            with_payload=False,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        got = {int(p.id) for p in response.points}
+        recalls.append(len(got & set(int(x) for x in expected)) / k)
+    return {
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+    }
+
+
+def mark_pareto(rows):
+    """Flag configs not beaten on both recall (higher) and p99 latency (lower)."""
+    for row in rows:
+        row["pareto"] = not any(
+            o is not row
+            and o["recall_at_k"] >= row["recall_at_k"]
+            and o["p99_ms"] <= row["p99_ms"]
+            and (o["recall_at_k"] > row["recall_at_k"] or o["p99_ms"] < row["p99_ms"])
+            for o in rows
+        )
+
+
+def render_markdown(report):
+    lines = [
+        f"# Retrieval benchmark — {report['created']}",
+        "",
+        f"Qdrant: {report['qdrant_url']}, queries: {report['queries']}, k = {report['k']}  ",
+        "Memory is an estimate (vectors + quantized copy + HNSW level-0 links). * = Pareto-optimal on recall/p99.",
+        "",
+        "| chunk size | points | m | ef_construct | quantization | ef | recall@k | p50 ms | p99 ms | index MB (est.) | build s |",
+        "|---|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in sorted(report["results"], key=lambda r: (-r["recall_at_k"], r["p99_ms"])):
+        star = " *" if r["pareto"] else ""
+        lines.append(
+            f"| {r['chunk_size']} | {r['points']} | {r['m']} | {r['ef_construct']} | {r['quantization']} | {r['ef']} "
+            f"| {r['recall_at_k']:.3f}{star} | {r['p50_ms']} | {r['p99_ms']} | {r['index_mb_est']} | {r['build_seconds']} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep HNSW/quantization/chunking settings for vdpo_documents")
+    parser.add_argument("--qdrant-url", default=LOCAL_QDRANT_URL)
+    parser.add_argument("--text-dir", default=embed.TEXT_DIR)
+    parser.add_argument("--queries", help="file with one query per line (default: built-in set)")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--m", nargs="+", type=int, default=DEFAULT_M)
+    parser.add_argument("--ef-construct", nargs="+", type=int, default=DEFAULT_EF_CONSTRUCT)
+    parser.add_argument("--ef", nargs="+", type=int, default=DEFAULT_EF)
+    parser.add_argument("--quantization", nargs="+", choices=["none", "scalar"], default=DEFAULT_QUANTIZATION)
+    parser.add_argument("--chunk-size", nargs="+", type=int, default=DEFAULT_CHUNK_SIZES)
+    parser.add_argument("--max-chunks", type=int, help="cap corpus size for quick runs")
+    parser.add_argument("--out", default=REPORT_DIR)
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.qdrant_url)
+    documents = embed.load_documents(args.text_dir)
+    queries = load_queries(args.queries)
+    print(f"📄 Loaded {len(documents)} documents and {len(queries)} queries.")
+
+    print("🔍 Loading embedding model...")
+    model = embed.load_model()
+    query_vectors = np.asarray(embed.embed_texts(model, queries), dtype=np.float32)
+
+    results = []
+    try:
+        for chunk_size in args.chunk_size:
+            chunks = build_corpus(documents, chunk_size, args.max_chunks)
+            print(f"✂️ chunk_size={chunk_size}: {len(chunks)} chunks, embedding...")
+            doc_vectors = np.asarray(
+                embed.embed_texts(model, [c["text"] for c in chunks], progress=True), dtype=np.float32
+            )
+            truth = exact_top_k(doc_vectors, query_vectors, args.k)
+
+            for m, ef_construct, quantization in itertools.product(args.m, args.ef_construct, args.quantization):
+                print(f"🏗️ Building m={m} ef_construct={ef_construct} quantization={quantization}...")
+                build_seconds, indexed = build_collection(client, doc_vectors, m, ef_construct, quantization)
+                if not indexed:
+                    print("⚠️ Index not finished before timeout; results may reflect partial indexing.")
+                for ef in args.ef:
+                    row = run_queries(client, query_vectors, truth, args.k, ef, quantization)
+                    row.update({
+                        "chunk_size": chunk_size,
+                        "points": len(chunks),
+                        "m": m,
+                        "ef_construct": ef_construct,
+                        "quantization": quantization,
+                        "ef": ef,
+                        "index_mb_est": estimate_index_mb(len(chunks), doc_vectors.shape[1], m, quantization),
+                        "build_seconds": round(build_seconds, 2),
+                        "fully_indexed": indexed,
+                    })
+                    results.append(row)
+                    print(f"   ef={ef}: recall@{args.k}={row['recall_at_k']:.3f} "
+                          f"p50={row['p50_ms']}ms p99={row['p99_ms']}ms")
+    finally:
+        if client.collection_exists(BENCH_COLLECTION):
+            client.delete_collection(BENCH_COLLECTION)
+
+    mark_pareto(results)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "qdrant_url": args.qdrant_url,
+        "queries": len(queries),
+        "k": args.k,
+        "results": results,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    json_path = os.path.join(args.out, f"retrieval_{stamp}.json")
+    md_path = os.path.join(args.out, f"retrieval_{stamp}.md")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    markdown = render_markdown(report)
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(markdown)
+
+    print(markdown)
+    print(f"✅ Report written to {json_path} and {md_path}")
+
+
+if __name__ == "__main__":
+    main()
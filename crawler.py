@@ -0,0 +1,544 @@
+import os
+import time
+import queue
+import sqlite3
+import tempfile
+import argparse
+import importlib
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urljoin, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+from tqdm import tqdm
+
+from downloader import FILE_MODE, Downloader, make_session
+
+# === CONFIG ===
+FRONTIER_DB = "./crawl_frontier.sqlite"
+CRAWL_WORKERS = 4
+BROWSER_POOL_SIZE = 2
+RENDER_TIMEOUT = 15      # seconds to wait for a rule's selector in the browser
+HTTP_TIMEOUT = (10, 30)
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 300      # seconds before a failed URL is retried, doubled per attempt
+FAILED_RECRAWL_AFTER = 7 * 24 * 3600  # seconds before a URL that exhausted its attempts is tried again
+# Modules whose SiteRule subclasses are registered on import
+RULE_MODULES = ["fetch_ico", "fetch_edps", "fetch_iapp", "fetch_eu_nis2"]
+
+RULES = {}
+
+
+def register(rule_cls):
+    """Class decorator adding a SiteRule to the registry under its ``name``."""
+    RULES[rule_cls.name] = rule_cls
+    return rule_cls
+
+
+def load_rules():
+    for module in RULE_MODULES:
+        importlib.import_module(module)
+    return RULES
+
+
+def normalize_url(url):
+    """Canonical form used for de-duplication: no fragment, lowercase scheme and host."""
+    url, _ = urldefrag(url.strip())
+    parts = urlparse(url)
+    return urlunparse(parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower()))
+
+
+@dataclass
+class PageResult:
+    links: list = field(default_factory=list)       # pages to enqueue at depth + 1
+    documents: list = field(default_factory=list)   # files to download (PDFs)
+    texts: dict = field(default_factory=dict)       # filename -> extracted text
+
+
+class SiteRule:
+    """Per-site crawl plugin. Subclass, set the attributes and implement ``parse``.
+
+    ``render`` is "auto" (plain HTTP first, browser only if ``needs_render``),
+    "never" or "always".
+    """
+    name = None
+    start_urls = []
+    allowed_domains = None
+    max_depth = 1
+    render = "auto"
+    download_dir = None
+    text_dir = None
+
+    def wait_selector(self, url, depth):
+        """CSS selector whose presence means the page content is loaded."""
+        return None
+
+    def needs_render(self, url, depth, soup):
+        if self.render == "always":
+            return True
+        if self.render == "never":
+            return False
+        selector = self.wait_selector(url, depth)
+        return bool(selector) and soup.select_one(selector) is None
+
+    def allows(self, url):
+        if not self.allowed_domains:
+            return True
+        host = urlparse(url).netloc.lower()
+        return any(host == d or host.endswith("." + d) for d in self.allowed_domains)
+
+    def parse(self, url, depth, soup):
+        raise NotImplementedError
+
+
+class Frontier:
+    """Persistent, de-duplicated URL frontier shared by all sites.
+
+    Rows are keyed by (site, url); ``kind`` is "page" or "document". State
+    survives restarts, so an interrupted crawl resumes where it stopped and
+    a finished one only revisits start pages and stale entries.
+    """
+
+    def __init__(self, path=FRONTIER_DB):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS frontier (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL DEFAULT 'page',
+                    depth INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    etag TEXT,
+                    last_modified TEXT,
+                    rendered INTEGER NOT NULL DEFAULT 0,
+                    fetched_at REAL,
+                    not_before REAL,
+                    error TEXT,
+                    PRIMARY KEY (site, url)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS frontier_status ON frontier (site, kind, status)")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(frontier)")}
+            if "not_before" not in columns:  # frontier created before retry backoff existed
+                self._conn.execute("ALTER TABLE frontier ADD COLUMN not_before REAL")
+
+    def add(self, site, url, depth=0, kind="page", force=False):
+        """Enqueue a URL; returns True if it was new.
+
+        ``force`` re-queues a known URL that was fetched successfully ('done').
+        Rows still pending, backing off or 'failed' keep their retry state;
+        failed ones only come back through ``requeue_stale``.
+        """
+        url = normalize_url(url)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO frontier (site, url, kind, depth) VALUES (?, ?, ?, ?)",
+                (site, url, kind, depth),
+            )
+            if cur.rowcount == 0 and force:
+                self._conn.execute(
+                    "UPDATE frontier SET status = 'pending', attempts = 0, not_before = NULL "
+                    "WHERE site = ? AND url = ? AND status = 'done'",
+                    (site, url),
+                )
+            return cur.rowcount > 0
+
+    def claim(self, site, kind="page"):
+        """Atomically take the next pending URL that is not backing off, or None."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT url, depth, etag, last_modified FROM frontier "
+                "WHERE site = ? AND kind = ? AND status = 'pending' AND (not_before IS NULL OR not_before <= ?) "
+                "ORDER BY depth, rowid LIMIT 1",
+                (site, kind, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE frontier SET status = 'in_progress', attempts = attempts + 1 WHERE site = ? AND url = ?",
+                (site, row[0]),
+            )
+            return row
+
+    def claim_all(self, site, kind="document"):
+        """Take every pending URL of ``kind`` at once (batch downloads), counting an attempt for each."""
+        ready = "site = ? AND kind = ? AND status = 'pending' AND (not_before IS NULL OR not_before <= ?)"
+        with self._lock, self._conn:
+            now = time.time()
+            rows = self._conn.execute(f"SELECT url FROM frontier WHERE {ready}", (site, kind, now)).fetchall()
+            self._conn.execute(
+                f"UPDATE frontier SET status = 'in_progress', attempts = attempts + 1 WHERE {ready}",
+                (site, kind, now),
+            )
+        return [r[0] for r in rows]
+
+    def complete(self, site, url, etag=None, last_modified=None, rendered=False):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE frontier SET status = 'done', etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), rendered = ?, fetched_at = ?, error = NULL, "
+                "not_before = NULL "
+                "WHERE site = ? AND url = ?",
+                (etag, last_modified, int(rendered), time.time(), site, normalize_url(url)),
+            )
+
+    def fail(self, site, url, error):
+        """Record a failure; the URL is retried after an exponential backoff until MAX_ATTEMPTS.
+
+        The backoff normally outlasts the current crawl, so failed URLs are
+        picked up again by a later run rather than hammered in a tight loop.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE frontier SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, fetched_at = ?, not_before = ? + ? * (1 << MAX(attempts - 1, 0)) "
+                "WHERE site = ? AND url = ?",
+                (MAX_ATTEMPTS, str(error)[:500], now, now, RETRY_BACKOFF, site, normalize_url(url)),
+            )
+
+    def reset_in_progress(self, site):
+        """Return URLs left 'in_progress' by an interrupted run to the queue."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE frontier SET status = 'pending' WHERE site = ? AND status = 'in_progress'", (site,)
+            )
+
+    def requeue_stale(self, site, max_age_seconds, failed_max_age_seconds=FAILED_RECRAWL_AFTER):
+        """Re-queue pages fetched longer ago than ``max_age_seconds``.
+
+        URLs that exhausted their attempts ('failed', pages or documents) get
+        a fresh set of attempts only once they are older than
+        ``failed_max_age_seconds`` (never sooner than ``max_age_seconds``), so
+        frequent recrawls don't keep retrying dead links.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE frontier SET status = 'pending', attempts = 0, not_before = NULL "
+                "WHERE site = ? AND ("
+                "(kind = 'page' AND status = 'done' AND fetched_at < ?) OR (status = 'failed' AND fetched_at < ?))",
+                (site, now - max_age_seconds, now - max(max_age_seconds, failed_max_age_seconds)),
+            )
+
+    def clear(self, site):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM frontier WHERE site = ?", (site,))
+
+    def stats(self, site):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, status, COUNT(*) FROM frontier WHERE site = ? GROUP BY kind, status", (site,)
+            ).fetchall()
+        return {f"{kind}:{status}": count for kind, status, count in rows}
+
+    def close(self):
+        self._conn.close()
+
+
+class BrowserPool:
+    """Lazily started, reused headless Chrome instances.
+
+    Selenium is only imported when a page actually needs rendering, so
+    static-HTML crawls never start a browser.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE):
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _create(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--window-size=1920,1080")
+        driver = webdriver.Chrome(options=options)
+        with self._lock:
+            self._all.append(driver)
+        return driver
+
+    @contextmanager
+    def driver(self):
+        with self._slots:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._create()
+            healthy = True
+            try:
+                yield driver
+            except Exception:
+                healthy = False
+                raise
+            finally:
+                if healthy:
+                    self._idle.put(driver)
+                else:
+                    self._discard(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def render(self, url, selector=None, timeout=RENDER_TIMEOUT):
+        """Load a page and wait until ``selector`` is present (or the document is ready)."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        with self.driver() as driver:
+            driver.get(url)
+            wait = WebDriverWait(driver, timeout)
+            try:
+                if selector:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+                else:
+                    wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+            except TimeoutException:
+                pass  # parse whatever did load; the rule decides if it is usable
+            return driver.page_source
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    rendered: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    texts_saved: int = 0
+    documents: dict = field(default_factory=lambda: {"downloaded": 0, "unchanged": 0, "failed": 0})
+
+
+class CrawlEngine:
+    """Runs SiteRules against a shared frontier, HTTP session and browser pool."""
+
+    def __init__(self, frontier=None, session=None, browser_pool=None, workers=CRAWL_WORKERS):
+        self.frontier = frontier or Frontier()
+        self.session = session or make_session(workers)
+        self.browsers = browser_pool or BrowserPool()
+        self.workers = workers
+        self._stats_lock = threading.Lock()
+
+    def fetch(self, rule, url, depth, etag=None, last_modified=None):
+        """Plain HTTP first; returns (soup or None if unchanged, response, rendered)."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = self.session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+        if response.status_code == 304:
+            return None, response, False
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+        if rule.needs_render(url, depth, soup):
+            html = self.browsers.render(url, rule.wait_selector(url, depth))
+            return BeautifulSoup(html, "html.parser"), response, True
+        return soup, response, False
+
+    def _save_text(self, rule, filename, text):
+        text_dir = rule.text_dir or "./"
+        os.makedirs(text_dir, exist_ok=True)
+        path = os.path.join(text_dir, filename)
+        # unique hidden temp file, like Downloader's, so concurrent workers never share one
+        fd, tmp = tempfile.mkstemp(dir=text_dir, prefix=".", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.chmod(tmp, FILE_MODE)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return path
+
+    def _crawl_page(self, rule, row, stats, on_text=None):
+        url, depth, etag, last_modified = row
+        site = rule.name
+        try:
+            soup, response, rendered = self.fetch(rule, url, depth, etag, last_modified)
+        except Exception as e:
+            self.frontier.fail(site, url, repr(e))
+            with self._stats_lock:
+                stats.failed += 1
+            tqdm.write(f"⚠️ [{site}] Failed to load {url} — {e}")
+            return
+
+        if soup is None:
+            self.frontier.complete(site, url)
+            with self._stats_lock:
+                stats.unchanged += 1
+            return
+
+        try:
+            result = rule.parse(url, depth, soup) or PageResult()
+        except Exception as e:
+            self.frontier.fail(site, url, repr(e))
+            with self._stats_lock:
+                stats.failed += 1
+            tqdm.write(f"⚠️ [{site}] Failed to parse {url} — {e}")
+            return
+
+        # rules may return relative hrefs; resolve them against the page once here
+        if depth < rule.max_depth:
+            for link in result.links:
+                link = urljoin(url, link)
+                if rule.allows(link):
+                    self.frontier.add(site, link, depth + 1)
+        for doc_url in result.documents:
+            self.frontier.add(site, urljoin(url, doc_url), depth + 1, kind="document", force=True)
+        for filename, text in result.texts.items():
+            path = self._save_text(rule, filename, text)
+            if on_text:
+                on_text(path)
+
+        self.frontier.complete(
+            site, url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            rendered=rendered,
+        )
+        with self._stats_lock:
+            stats.pages += 1
+            stats.rendered += int(rendered)
+            stats.texts_saved += len(result.texts)
+
+    def _crawl_pages(self, rule, stats, on_text=None):
+        active = 0
+        cond = threading.Condition()
+        progress = tqdm(desc=f"🔍 Crawling {rule.name}", unit="page")
+
+        def worker():
+            nonlocal active
+            while True:
+                with cond:
+                    row = self.frontier.claim(rule.name)
+                    while row is None and active > 0:
+                        # other workers may still discover links
+                        cond.wait(timeout=1)
+                        row = self.frontier.claim(rule.name)
+                    if row is None:
+                        cond.notify_all()
+                        return
+                    active += 1
+                try:
+                    self._crawl_page(rule, row, stats, on_text)
+                    progress.update(1)
+                finally:
+                    with cond:
+                        active -= 1
+                        cond.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in [pool.submit(worker) for _ in range(self.workers)]:
+                future.result()
+        progress.close()
+
+    def _download_documents(self, rule, stats, on_downloaded):
+        if not rule.download_dir:
+            return
+        urls = self.frontier.claim_all(rule.name, kind="document")
+        if not urls:
+            return
+        downloader = Downloader(rule.download_dir, session=self.session)
+        for result in tqdm(downloader.iter_downloads(urls), total=len(urls), desc=f"📥 Downloading {rule.name}"):
+            if result.status == "failed":
+                self.frontier.fail(rule.name, result.url, result.error)
+                tqdm.write(f"❌ [{rule.name}] Error downloading {result.url} — {result.error}")
+            else:
+                self.frontier.complete(rule.name, result.url)
+            stats.documents[result.status] = stats.documents.get(result.status, 0) + 1
+            if on_downloaded:
+                on_downloaded(result)
+
+    def crawl(self, rule, recrawl_after=None, on_downloaded=None, on_text=None):
+        """Crawl one site. Start pages are always revisited; others only when pending or stale.
+
+        ``on_downloaded(result)`` is called for every finished document download
+        and ``on_text(path)`` for every text file a rule saves.
+        """
+        site = rule.name
+        self.frontier.reset_in_progress(site)
+        if recrawl_after is not None:
+            self.frontier.requeue_stale(site, recrawl_after)
+        for url in rule.start_urls:
+            self.frontier.add(site, url, 0, force=True)
+
+        stats = CrawlStats()
+        self._crawl_pages(rule, stats, on_text)
+        self._download_documents(rule, stats, on_downloaded)
+        return stats
+
+    def close(self):
+        self.browsers.close()
+        self.frontier.close()
+
+
+def print_stats(site, stats):
+    print(f"✅ [{site}] {stats.pages} pages parsed ({stats.rendered} rendered), {stats.unchanged} unchanged, "
+          f"{stats.failed} failed, {stats.texts_saved} texts saved; documents: {stats.documents['downloaded']} "
+          f"downloaded, {stats.documents['unchanged']} unchanged, {stats.documents['failed']} failed.")
+
+
+def run_rule(rule, recrawl_after=None):
+    """Crawl a single rule with a fresh engine; used by the fetch_* scripts."""
+    engine = CrawlEngine()
+    try:
+        stats = engine.crawl(rule, recrawl_after=recrawl_after)
+        print_stats(rule.name, stats)
+        return stats
+    finally:
+        engine.close()
+
+
+def main():
+    rules = load_rules()
+    parser = argparse.ArgumentParser(description="Crawl regulator sites into the shared frontier")
+    parser.add_argument("sites", nargs="*", default=sorted(rules), help=f"sites to crawl ({', '.join(sorted(rules))})")
+    parser.add_argument("--recrawl-after", type=float, help="re-queue pages fetched more than N hours ago")
+    parser.add_argument("--fresh", action="store_true", help="forget previous crawl state for these sites")
+    args = parser.parse_args()
+
+    engine = CrawlEngine()
+    try:
+        for site in args.sites:
+            if site not in rules:
+                print(f"❌ Unknown site: {site}")
+                continue
+            if args.fresh:
+                engine.frontier.clear(site)
+            recrawl = args.recrawl_after * 3600 if args.recrawl_after is not None else None
+            print_stats(site, engine.crawl(rules[site](), recrawl_after=recrawl))
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
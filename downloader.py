@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import random
+import tempfile
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse, unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# === CONFIG ===
+MAX_WORKERS = 8          # total concurrent downloads
+MAX_PER_HOST = 4         # concurrent downloads against any single host
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0       # seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (10, 60)       # (connect, read) seconds
+CACHE_FILENAME = ".download_cache.json"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "PrivacyX-fetcher/1.0"
+
+# mkstemp creates files 0600; downloads should get the usual umask-based mode
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    path: str
+    status: str          # "downloaded", "unchanged" or "failed"
+    bytes: int = 0
+    error: str = ""
+
+
+def make_session(pool_size=MAX_WORKERS):
+    """requests.Session with a connection pool large enough for the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def filename_from_url(url):
+    """Local filename for a URL: last path segment, falling back to the host."""
+    parsed = urlparse(url)
+    name = unquote(os.path.basename(parsed.path.rstrip("/")))
+    return name or parsed.netloc
+
+
+def _retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date), None if absent or invalid."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Downloader:
+    """Pooled, per-host bounded downloader that streams files to disk.
+
+    Files are written to a temporary ``.part`` file in ``dest_dir`` and
+    atomically renamed into place, so a crash never leaves a truncated PDF
+    behind. ETag/Last-Modified validators are kept in a JSON sidecar in
+    ``dest_dir`` and sent back as conditional headers, so documents that
+    have not changed are skipped with a 304.
+    """
+
+    def __init__(self, dest_dir, session=None, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, chunk_size=CHUNK_SIZE, timeout=TIMEOUT):
+        self.dest_dir = dest_dir
+        os.makedirs(dest_dir, exist_ok=True)
+        self.session = session or make_session(max_workers)
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._cache_path = os.path.join(dest_dir, CACHE_FILENAME)
+        self._cache = self._load_cache()
+
+    # --- validator cache ---
+    def _load_cache(self):
+        try:
+            with open(self._cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        # caller holds self._lock
+        fd, tmp = tempfile.mkstemp(dir=self.dest_dir, prefix=".cache-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, indent=1)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, self._cache_path)
+
+    def _conditional_headers(self, url, path):
+        entry = self._cache.get(url)
+        if not entry or not os.path.exists(path):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _remember(self, url, path, response):
+        with self._lock:
+            self._cache[url] = {
+                "path": os.path.basename(path),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            self._save_cache()
+
+    # --- concurrency ---
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _backoff(self, attempt, response=None):
+        delay = _retry_after_seconds(response)
+        if delay is None:
+            delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+        time.sleep(min(delay, BACKOFF_MAX))
+
+    # --- single download ---
+    def _stream_to_disk(self, response, path):
+        fd, tmp = tempfile.mkstemp(dir=self.dest_dir, prefix=".", suffix=".part")
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        written += len(chunk)
+            os.chmod(tmp, FILE_MODE)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return written
+
+    def download(self, url, filename=None):
+        """Download one URL into dest_dir. Never raises; failures come back as status 'failed'."""
+        path = os.path.join(self.dest_dir, filename or filename_from_url(url))
+        last_error = ""
+        with self._host_slot(url):
+            for attempt in range(self.max_retries + 1):
+                response = None
+                try:
+                    response = self.session.get(
+                        url,
+                        headers=self._conditional_headers(url, path),
+                        stream=True,
+                        timeout=self.timeout,
+                    )
+                    with response:
+                        if response.status_code == 304:
+                            return DownloadResult(url, path, "unchanged")
+                        if response.status_code in RETRY_STATUSES:
+                            last_error = f"HTTP {response.status_code}"
+                        else:
+                            response.raise_for_status()
+                            written = self._stream_to_disk(response, path)
+                            self._remember(url, path, response)
+                            return DownloadResult(url, path, "downloaded", bytes=written)
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    last_error = repr(e)
+                except Exception as e:
+                    # non-retryable (4xx, disk errors, ...)
+                    return DownloadResult(url, path, "failed", error=repr(e))
+                if attempt < self.max_retries:
+                    self._backoff(attempt, response)
+        return DownloadResult(url, path, "failed", error=last_error)
+
+    # --- batches ---
+    def iter_downloads(self, urls):
+        """Download URLs concurrently, yielding each DownloadResult as soon as it finishes."""
+        urls = list(dict.fromkeys(urls))  # dedupe, keep order
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.download, url) for url in urls]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def download_all(self, urls):
+        return list(self.iter_downloads(urls))
+
+
+def summarise(results):
+    """Count results by status, e.g. {'downloaded': 3, 'unchanged': 10, 'failed': 1}."""
+    counts = {"downloaded": 0, "unchanged": 0, "failed": 0}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    return counts
@@ -1,82 +1,186 @@
 import os
+import uuid
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, FilterSelector,
+    PayloadSchemaType,
+)
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from dotenv import load_dotenv
-import os
+from metadata import document_metadata, load_origins
+from keyword_index import KeywordIndex, KEYWORD_INDEX_PATH
 load_dotenv()
 # === CONFIG ===
 TEXT_DIR = "./extracted_texts"
 COLLECTION_NAME = "vdpo_documents"
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-# STEP 1: Load documents
-documents = []
-for filename in os.listdir(TEXT_DIR):
-    if filename.endswith(".txt"):
-        with open(os.path.join(TEXT_DIR, filename), "r", encoding="utf-8") as f:
-            content = f.read()
-            documents.append({"text": content, "source": filename})
-
-print(f"📄 Loaded {len(documents)} documents.")
-
-# STEP 2: Chunk the text
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50,
-    separators=["\n\n", "\n", " ", ""]
-)
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # 384 dim vectors
+VECTOR_SIZE = 384
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+MIN_CHUNK_CHARS = 30
+BATCH_SIZE = 128
+UPLOAD_BATCH_SIZE = 64
+# Payload fields filtered on by /ask (and by upsert_document for "source")
+PAYLOAD_INDEXES = {
+    "source": PayloadSchemaType.KEYWORD,
+    "regulator": PayloadSchemaType.KEYWORD,
+    "doc_type": PayloadSchemaType.KEYWORD,
+    "jurisdiction": PayloadSchemaType.KEYWORD,
+    "year": PayloadSchemaType.INTEGER,
+}
+
+
+def load_documents(text_dir=TEXT_DIR):
+    origins = load_origins()
+    documents = []
+    for filename in os.listdir(text_dir):
+        if filename.endswith(".txt"):
+            with open(os.path.join(text_dir, filename), "r", encoding="utf-8") as f:
+                origin = origins.get(os.path.splitext(filename)[0])
+                documents.append({
+                    "text": f.read(),
+                    "source": filename,
+                    "metadata": document_metadata(filename, origin),
+                })
+    return documents
+
+
+def make_splitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", " ", ""]
+    )
 
-chunks = []
-for doc in documents:
+
+def chunk_document(doc, splitter):
+    """Split one document into chunk dicts; ``index`` is the chunk's position within the source."""
+    metadata = doc.get("metadata") or document_metadata(doc["source"])
+    chunks = []
     for chunk in splitter.split_text(doc["text"]):
-        if len(chunk.strip()) >= 30:  # skip short chunks
-            chunks.append({"text": chunk.strip(), "metadata": {"source": doc["source"]}})
+        if len(chunk.strip()) >= MIN_CHUNK_CHARS:  # skip short chunks
+            chunks.append({
+                "text": chunk.strip(),
+                "source": doc["source"],
+                "index": len(chunks),
+                "metadata": metadata,
+            })
+    return chunks
 
-print(f"Created {len(chunks)} chunks.")
 
-# STEP 3: Generate Embeddings
-print("🔍 Loading embedding model...")
-model = SentenceTransformer("all-MiniLM-L6-v2")  # 384 dim vectors
+def point_id(source, index):
+    """Stable point id, so re-embedding a document overwrites its previous chunks."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{index}"))
 
-texts = [chunk["text"] for chunk in chunks]
-metadatas = [chunk["metadata"] for chunk in chunks]
 
-vectors = []
-BATCH_SIZE = 128
-for i in tqdm(range(0, len(texts), BATCH_SIZE), desc="Embedding in batches"):
-    batch_texts = texts[i:i + BATCH_SIZE]
-    batch_vectors = model.encode(batch_texts, show_progress_bar=False).tolist()
-    vectors.extend(batch_vectors)
-
-payloads = []
-for idx in range(len(texts)):
-    payloads.append({
-        "text": texts[idx],
-        "source": metadatas[idx]["source"]
-    })
-
-#STEP 4: Upload to Qdrant
-print("Connecting to Qdrant...")
-client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
-
-if client.collection_exists(collection_name=COLLECTION_NAME):
-    client.delete_collection(collection_name=COLLECTION_NAME)
-
-client.create_collection(
-    collection_name=COLLECTION_NAME,
-    vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-)
+def chunk_payload(chunk):
+    return {"text": chunk["text"], "source": chunk["source"], **chunk.get("metadata", {})}
+
+
+def load_model():
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def embed_texts(model, texts, progress=False):
+    vectors = []
+    batches = range(0, len(texts), BATCH_SIZE)
+    if progress:
+        batches = tqdm(batches, desc="Embedding in batches")
+    for i in batches:
+        batch_texts = texts[i:i + BATCH_SIZE]
+        vectors.extend(model.encode(batch_texts, show_progress_bar=False).tolist())
+    return vectors
+
+
+def get_client():
+    return QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+
+
+def create_collection(client, recreate=False):
+    """Create the collection; with ``recreate`` an existing one is dropped first."""
+    exists = client.collection_exists(collection_name=COLLECTION_NAME)
+    if exists and recreate:
+        client.delete_collection(collection_name=COLLECTION_NAME)
+        exists = False
+    if not exists:
+        client.create_collection(
+            collection_name=COLLECTION_NAME,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+        )
+    create_payload_indexes(client)
+
+
+def create_payload_indexes(client):
+    """Index the filterable payload fields so filtered searches don't scan every point."""
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        client.create_payload_index(
+            collection_name=COLLECTION_NAME,
+            field_name=field_name,
+            field_schema=schema,
+        )
+
+
+def upsert_document(client, source, chunks, vectors):
+    """Replace every point of ``source`` with the given chunks (incremental update)."""
+    client.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=FilterSelector(filter=Filter(
+            must=[FieldCondition(key="source", match=MatchValue(value=source))]
+        )),
+    )
+    for i in range(0, len(chunks), UPLOAD_BATCH_SIZE):
+        client.upsert(
+            collection_name=COLLECTION_NAME,
+            points=[
+                PointStruct(id=point_id(c["source"], c["index"]), vector=v, payload=chunk_payload(c))
+                for c, v in zip(chunks[i:i + UPLOAD_BATCH_SIZE], vectors[i:i + UPLOAD_BATCH_SIZE])
+            ],
+        )
+
+
+def main():
+    # STEP 1: Load documents
+    documents = load_documents()
+    print(f"📄 Loaded {len(documents)} documents.")
+
+    # STEP 2: Chunk the text
+    splitter = make_splitter()
+    chunks = []
+    for doc in documents:
+        chunks.extend(chunk_document(doc, splitter))
+    print(f"Created {len(chunks)} chunks.")
+
+    # STEP 3: Generate Embeddings
+    print("🔍 Loading embedding model...")
+    model = load_model()
+    vectors = embed_texts(model, [chunk["text"] for chunk in chunks], progress=True)
+
+    #STEP 4: Upload to Qdrant
+    print("Connecting to Qdrant...")
+    client = get_client()
+    create_collection(client, recreate=True)
+
+    print("Uploading vectors to Qdrant...")
+    client.upload_collection(
+        collection_name=COLLECTION_NAME,
+        vectors=vectors,
+        payload=[chunk_payload(c) for c in chunks],
+        ids=[point_id(c["source"], c["index"]) for c in chunks],
+        batch_size=UPLOAD_BATCH_SIZE
+    )
+
+    print("All vectors embedded and uploaded to Qdrant Cloud.")
+
+    # STEP 5: Keyword index (BM25 + article/recital citations) loaded by main.py
+    keyword_index = KeywordIndex.build(chunks, documents, point_id)
+    keyword_index.save(KEYWORD_INDEX_PATH)
+    print(f"Saved keyword index ({len(keyword_index.postings)} terms, "
+          f"{len(keyword_index.citations)} citations) to {KEYWORD_INDEX_PATH}.")
 
-print("Uploading vectors to Qdrant...")
-client.upload_collection(
-    collection_name=COLLECTION_NAME,
-    vectors=vectors,
-    payload=payloads,
-    ids=None,
-    batch_size=64
-)
 
-print("All vectors embedded and uploaded to Qdrant Cloud.")
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,15 @@
-import os
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from tqdm import tqdm
+from downloader import Downloader, summarise
 
 # Base URL for EDPB documents
 base_url = "https://edpb.europa.eu/our-work-tools/our-documents_en"
 save_folder = "./"
-os.makedirs(save_folder, exist_ok=True)
+downloader = Downloader(save_folder)
 
 # Fetch HTML
-response = requests.get(base_url)
+response = downloader.session.get(base_url)
 soup = BeautifulSoup(response.content, "html.parser")
 
 # Find all .pdf links that look like English versions
@@ -24,15 +23,12 @@ for link in soup.find_all("a", href=True):
 print(f"🔎 Found {len(pdf_links)} English PDFs.")
 
 # Download PDFs
-for pdf_url in tqdm(pdf_links, desc="📥 Downloading English PDFs"):
-    filename = os.path.basename(pdf_url)
-    file_path = os.path.join(save_folder, filename)
+results = []
+for result in tqdm(downloader.iter_downloads(pdf_links), total=len(pdf_links), desc="📥 Downloading English PDFs"):
+    if result.status == "failed":
+        tqdm.write(f"❌ Failed to download {result.url}: {result.error}")
+    results.append(result)
 
-    try:
-        r = requests.get(pdf_url)
-        with open(file_path, "wb") as f:
-            f.write(r.content)
-    except Exception as e:
-        print(f"❌ Failed to download {pdf_url}: {e}")
-
-print(f"\n✅ Downloaded {len(pdf_links)} English PDFs to: {save_folder}")
+counts = summarise(results)
+print(f"\n✅ Downloaded {counts['downloaded']} new/updated PDFs, {counts['unchanged']} unchanged, "
+      f"{counts['failed']} failed in: {save_folder}")
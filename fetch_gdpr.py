@@ -1,12 +1,13 @@
-import requests
+from downloader import Downloader
 
 GDPR_URL = "https://eur-lex.europa.eu/legal-content/EN/TXT/PDF/?uri=CELEX:32016R0679"
 filename = "gdpr_official_en.pdf"
 
-response = requests.get(GDPR_URL)
-response.raise_for_status()
+result = Downloader("./").download(GDPR_URL, filename=filename)
+if result.status == "failed":
+    raise SystemExit(f"❌ Failed to download GDPR Regulation: {result.error}")
 
-with open(filename, "wb") as f:
-    f.write(response.content)
-
-print("✅ GDPR Regulation downloaded as:", filename)
+if result.status == "unchanged":
+    print("✅ GDPR Regulation unchanged since last download:", filename)
+else:
+    print("✅ GDPR Regulation downloaded as:", filename)
@@ -0,0 +1,298 @@
+import os
+import time
+import queue
+import shutil
+import argparse
+import threading
+from dataclasses import dataclass, field
+
+from metadata import SOURCE_DIRS, document_metadata, load_origins
+
+# === CONFIG ===
+QUEUE_SIZE = 32            # bounded queues give backpressure between stages
+EXTRACT_WORKERS = 2
+EMBED_WORKERS = 1          # one model instance; embedding batches internally
+CRAWL_INTERVAL = 30 * 60   # seconds between crawl rounds
+WATCH_INTERVAL = 10        # seconds between folder scans
+STATS_INTERVAL = 60        # seconds between stats lines
+
+_STOP = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    processed: int = 0
+    emitted: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    def line(self, inbox=None):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        depth = f", queue {inbox.qsize()}/{inbox.maxsize}" if inbox is not None else ""
+        per_item = self.busy_seconds / self.processed if self.processed else 0.0
+        return (f"{self.name}: {self.processed} in, {self.emitted} out, {self.errors} errors, "
+                f"{self.processed / elapsed * 60:.1f}/min, {per_item:.2f}s/item{depth}")
+
+
+class Stage:
+    """Pool of worker threads reading ``inbox`` and writing results to ``outbox``.
+
+    ``fn(item)`` returns an iterable of outputs (or None). When every worker
+    has seen the stop sentinel it is forwarded downstream, so the pipeline
+    drains in order on shutdown.
+    """
+
+    def __init__(self, name, fn, inbox, outbox=None, workers=1, setup=None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.setup = setup
+        self.stats = StageStats(name)
+        self._lock = threading.Lock()
+        self._finished = 0
+        self._threads = []
+
+    def _run(self):
+        while True:
+            item = self.inbox.get()
+            if item is _STOP:
+                with self._lock:
+                    self._finished += 1
+                    last = self._finished == self.workers
+                if last:
+                    if self.outbox is not None:
+                        self.outbox.put(_STOP)
+                else:
+                    self.inbox.put(_STOP)  # let sibling workers see it too
+                return
+            start = time.monotonic()
+            try:
+                outputs = list(self.fn(item) or [])
+            except Exception as e:
+                with self._lock:
+                    self.stats.errors += 1
+                print(f"❌ [{self.name}] {item!r}: {e}")
+                outputs = []
+            with self._lock:
+                self.stats.processed += 1
+                self.stats.busy_seconds += time.monotonic() - start
+                self.stats.emitted += len(outputs)
+            if self.outbox is not None:
+                for out in outputs:
+                    self.outbox.put(out)  # blocks when downstream is full
+
+    def start(self):
+        if self.setup:
+            self.setup()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def join(self):
+        for t in self._threads:
+            t.join()
+
+
+# --- stage functions ---
+
+class Extractor:
+    """PDF -> text file via extraction.process_pdf_file; text files pass straight through."""
+
+    def __init__(self):
+        import extraction
+        self.extraction = extraction
+        self.fail_log = os.path.join(extraction.ERR_DIR, "failed_extractions.log")
+        self._lock = threading.Lock()
+        self._origins = {}
+        self._origins_key = None
+
+    def origins(self):
+        """load_origins(), re-read only when a source folder changes (new file or download cache update)."""
+        key = []
+        for d in SOURCE_DIRS:
+            try:
+                key.append(os.stat(d).st_mtime_ns)
+            except OSError:
+                key.append(None)
+        key = tuple(key)
+        with self._lock:
+            if key != self._origins_key:
+                self._origins = load_origins()
+                self._origins_key = key
+            return self._origins
+
+    def __call__(self, path):
+        filename = os.path.basename(path)
+        stem, ext = os.path.splitext(filename)
+        text_path = os.path.join(self.extraction.TEXT_DIR, stem + ".txt")
+        if ext.lower() == ".pdf":
+            if not self.extraction.process_pdf_file(path, text_path, self.fail_log):
+                print(f"⚠️ [extract] Failed to extract: {filename} (see {self.fail_log})")
+                return []
+        elif ext.lower() == ".txt":
+            if os.path.abspath(path) != os.path.abspath(text_path):
+                shutil.copyfile(path, text_path)
+        else:
+            return []
+        source = os.path.basename(text_path)
+        origin = self.origins().get(stem, path)
+        with open(text_path, "r", encoding="utf-8") as f:
+            return [{"text": f.read(), "source": source, "metadata": document_metadata(source, origin)}]
+
+
+class Embedder:
+    """Chunk, embed and upsert one document; its previous chunks are replaced."""
+
+    def __init__(self):
+        self.model = None
+        self.client = None
+        self.splitter = None
+
+    def setup(self):
+        import embed
+        self.embed = embed
+        print("🔍 Loading embedding model...")
+        self.model = embed.load_model()
+        self.client = embed.get_client()
+        self.splitter = embed.make_splitter()
+        embed.create_collection(self.client)
+
+    def __call__(self, doc):
+        chunks = self.embed.chunk_document(doc, self.splitter)
+        if not chunks:
+            return []
+        vectors = self.embed.embed_texts(self.model, [c["text"] for c in chunks])
+        self.embed.upsert_document(self.client, doc["source"], chunks, vectors)
+        print(f"✅ [embed] {doc['source']}: {len(chunks)} chunks searchable")
+        return [doc["source"]]
+
+
+# --- sources ---
+
+def crawl_source(sites, out, stop, interval=CRAWL_INTERVAL, once=False):
+    """Crawl the given sites in rounds, pushing each new or changed file as it lands."""
+    from crawler import CrawlEngine, load_rules, print_stats
+
+    rules = load_rules()
+    engine = CrawlEngine()
+
+    def on_downloaded(result):
+        if result.status == "downloaded":
+            out.put(result.path)
+
+    try:
+        while not stop.is_set():
+            for site in sites:
+                if stop.is_set():
+                    break
+                stats = engine.crawl(rules[site](), recrawl_after=interval,
+                                     on_downloaded=on_downloaded, on_text=out.put)
+                print_stats(site, stats)
+            if once:
+                break
+            stop.wait(interval)
+    finally:
+        engine.close()
+
+
+def watch_source(dirs, out, stop, interval=WATCH_INTERVAL, backfill=False, once=False):
+    """Poll folders for new or modified PDFs/text files (e.g. from a manual fetcher run)."""
+    seen = {}
+
+    def scan():
+        found = {}
+        for d in dirs:
+            if not os.path.isdir(d):
+                continue
+            for filename in os.listdir(d):
+                if filename.lower().endswith((".pdf", ".txt")):
+                    path = os.path.join(d, filename)
+                    try:
+                        found[path] = os.path.getmtime(path)
+                    except OSError:
+                        pass
+        return found
+
+    if not backfill:
+        seen.update(scan())
+    while not stop.is_set():
+        for path, mtime in scan().items():
+            if seen.get(path) != mtime:
+                seen[path] = mtime
+                out.put(path)
+        if once:
+            break
+        stop.wait(interval)
+
+
+def main():
+    from crawler import load_rules
+
+    sites = sorted(load_rules())
+    parser = argparse.ArgumentParser(description="Fetch -> extract -> embed ingestion daemon")
+    parser.add_argument("--sites", nargs="*", default=sites, help=f"sites to crawl ({', '.join(sites)})")
+    parser.add_argument("--watch", action="append", default=[], help="also ingest files appearing in this folder")
+    parser.add_argument("--backfill", action="store_true",
+                        help="ingest files already in watched folders (implied by --once)")
+    parser.add_argument("--interval", type=float, default=CRAWL_INTERVAL / 60, help="minutes between crawl rounds")
+    parser.add_argument("--once", action="store_true",
+                        help="run one crawl round and one scan of watched folders, drain the pipeline and exit")
+    args = parser.parse_args()
+
+    to_extract = queue.Queue(maxsize=QUEUE_SIZE)
+    to_embed = queue.Queue(maxsize=QUEUE_SIZE)
+    embedder = Embedder()
+    stages = [
+        Stage("extract", Extractor(), to_extract, to_embed, workers=EXTRACT_WORKERS),
+        Stage("embed", embedder, to_embed, workers=EMBED_WORKERS, setup=embedder.setup),
+    ]
+    for stage in stages:
+        stage.start()
+
+    stop = threading.Event()
+    sources = []
+    if args.sites:
+        sources.append(threading.Thread(
+            target=crawl_source, args=(args.sites, to_extract, stop, args.interval * 60, args.once),
+            name="crawl", daemon=True,
+        ))
+    if args.watch:
+        sources.append(threading.Thread(
+            target=watch_source, args=(args.watch, to_extract, stop),
+            # a single scan only sees what is already there, so --once always backfills
+            kwargs={"backfill": args.backfill or args.once, "once": args.once}, name="watch", daemon=True,
+        ))
+    for t in sources:
+        t.start()
+
+    def report():
+        for stage in stages:
+            print(f"📊 {stage.stats.line(stage.inbox)}")
+
+    try:
+        last_report = time.monotonic()
+        while any(t.is_alive() for t in sources):
+            time.sleep(1)
+            if time.monotonic() - last_report >= STATS_INTERVAL:
+                report()
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping sources, draining pipeline...")
+        stop.set()
+        for t in sources:
+            t.join()
+
+    to_extract.put(_STOP)
+    for stage in stages:
+        stage.join()
+    report()
+    print("✅ Ingestion pipeline stopped.")
+
+
+if __name__ == "__main__":
+    main()
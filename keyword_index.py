@@ -0,0 +1,246 @@
+import re
+import math
+import gzip
+import json
+from collections import Counter, defaultdict
+
+# === CONFIG ===
+KEYWORD_INDEX_PATH = "./keyword_index.json.gz"
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60                 # reciprocal rank fusion constant
+MAX_CITATION_CHARS = 8000  # cap on stored article/recital text
+
+STOPWORDS = set("""
+a an and are as at be by can do does for from has have how i in is it its may must of on or shall should
+that the their there these this to under what when where which who why will with would
+""".split())
+
+# Instruments whose article/recital numbering we index, keyed by a filename pattern
+INSTRUMENTS = [
+    ("NIS2", re.compile(r"nis2", re.I)),
+    ("GDPR", re.compile(r"gdpr|32016r0679|chapter", re.I)),
+]
+DEFAULT_INSTRUMENT = "GDPR"
+INSTRUMENT_ALIASES = {
+    "gdpr": "GDPR", "uk gdpr": "GDPR", "eu gdpr": "GDPR",
+    "nis2": "NIS2", "nis 2": "NIS2", "nis2 directive": "NIS2",
+}
+
+ARTICLE_HEADING = re.compile(r"^\s*Article\s+(\d{1,3})\s*(?:[-–:]\s*[^.]{0,150})?\s*$", re.M)
+RECITAL_HEADING = re.compile(r"^\s*\((\d{1,3})\)\s+", re.M)
+ENACTING_FORMULA = "HAVE ADOPTED THIS"
+# Official Journal running header, e.g. "4.5.2016 EN Official Journal of the European Union L 119/1"
+OJ_PAGE_HEADER = re.compile(
+    r"^[ \t]*(?:(?:L[ \t]*\d+/\d+|EN|Official Journal of the European Union|\d{1,2}\.\d{1,2}\.\d{4})[ \t]*)+$\n?",
+    re.M,
+)
+CITATION_QUERY = re.compile(
+    r"\b(?:(gdpr|uk gdpr|eu gdpr|nis ?2)\s+)?(article|art\.?|recital)\s*(\d{1,3})\b"
+    r"(?!\s*(?:working\s+party|wp\b))"  # the "Article 29 Working Party" is not a citation
+    r"(?:\s*\((?:\d{1,3}|[a-z])\))*"  # paragraph and point, e.g. 6(1)(f)
+    r"(?:\s+(?:of\s+(?:the\s+)?)?(gdpr|uk gdpr|eu gdpr|nis ?2)\b)?",
+    re.I,
+)
+# Words that may surround a citation without turning it into a real question
+LOOKUP_FILLER = STOPWORDS | set("show me give text full says say read quote display".split())
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+
+def instrument_for(source):
+    for name, pattern in INSTRUMENTS:
+        if pattern.search(source):
+            return name
+    return None
+
+
+def _sections(text, heading):
+    """Yield (number, section text) for headings numbered consecutively from the first one.
+
+    A heading that breaks the sequence (a body line wrapping to "Article 9",
+    a stray "(3)") is running text and stays inside the current section.
+    """
+    matches = []
+    for m in heading.finditer(text):
+        if not matches or int(m.group(1)) == int(matches[-1].group(1)) + 1:
+            matches.append(m)
+    for i, m in enumerate(matches):
+        stop = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        yield int(m.group(1)), text[m.start():stop].strip()[:MAX_CITATION_CHARS]
+
+
+def _strip_footnotes(preamble):
+    """Cut page-bottom footnotes ("(1) OJ C 229, ...") out of the recitals.
+
+    Footnote numbers run behind the recital numbers, so a "(n)" line that goes
+    backwards starts a footnote block, which runs to the next page header.
+    """
+    kept, pos, last = [], 0, None
+    for m in RECITAL_HEADING.finditer(preamble):
+        if m.start() < pos:
+            continue
+        n = int(m.group(1))
+        if last is None or n == last + 1:
+            last = n
+        elif n <= last:
+            page_header = OJ_PAGE_HEADER.search(preamble, m.end())
+            if page_header:
+                kept.append(preamble[pos:m.start()])
+                pos = page_header.start()
+    kept.append(preamble[pos:])
+    return "".join(kept)
+
+
+def extract_citations(text):
+    """Article and recital texts from a legislative document, keyed "article:N" / "recital:N"."""
+    citations = {}
+    # recitals sit in the preamble, which ends at the enacting formula (or Article 1)
+    preamble_end = text.find(ENACTING_FORMULA)
+    if preamble_end < 0:
+        first_article = ARTICLE_HEADING.search(text)
+        preamble_end = first_article.start() if first_article else 0
+    preamble = OJ_PAGE_HEADER.sub("", _strip_footnotes(text[:preamble_end]))
+    for n, section in _sections(preamble, RECITAL_HEADING):
+        citations.setdefault(f"recital:{n}", section)
+    body = OJ_PAGE_HEADER.sub("", text[preamble_end:])
+    for n, section in _sections(body, ARTICLE_HEADING):
+        key = f"article:{n}"
+        if len(section) > len(citations.get(key, "")):
+            citations[key] = section
+    return citations
+
+
+def parse_citation(question):
+    """Return (instrument, kind, number, is_pure_lookup) for a cited article/recital, else None.
+
+    A bare "Article N" defaults to the GDPR only when the question is nothing
+    but the citation; inside a longer question the instrument must be named.
+    """
+    m = CITATION_QUERY.search(question)
+    if not m:
+        return None
+    alias = re.sub(r"\s+", " ", (m.group(1) or m.group(4) or "").lower())
+    instrument = INSTRUMENT_ALIASES.get(alias, DEFAULT_INSTRUMENT)
+    kind = "recital" if m.group(2).lower() == "recital" else "article"
+    rest = question[:m.start()] + " " + question[m.end():]
+    leftover = [t for t in re.findall(r"[a-z0-9]+", rest.lower()) if t not in LOOKUP_FILLER]
+    if leftover and not alias:
+        return None
+    return instrument, kind, int(m.group(3)), not leftover
+
+
+def matches_filters(meta, regulator="", doc_type="", jurisdiction="", year_from=""):
+    if regulator and meta.get("regulator") != regulator:
+        return False
+    if doc_type and meta.get("doc_type") != doc_type:
+        return False
+    if jurisdiction and meta.get("jurisdiction") != jurisdiction:
+        return False
+    if str(year_from).strip().isdigit():
+        year = meta.get("year")
+        if year is None or year < int(year_from):
+            return False
+    return True
+
+
+class KeywordIndex:
+    """BM25 over embedded chunks plus an article/recital citation map.
+
+    Chunks are referenced by their Qdrant point id, so keyword hits can be
+    fused with dense hits and their payload fetched from Qdrant. Only
+    citation texts are stored in full.
+    """
+
+    META_FIELDS = ("source", "regulator", "doc_type", "jurisdiction", "year")
+
+    def __init__(self, ids=None, meta=None, doc_lens=None, postings=None, citations=None):
+        self.ids = ids or []
+        self.meta = meta or []
+        self.doc_lens = doc_lens or []
+        self.postings = postings or {}   # term -> [[chunk positions], [term frequencies]]
+        self.citations = citations or {} # "GDPR:article:33" -> {"text": ..., "source": ..., "metadata": ...}
+        self.avgdl = sum(self.doc_lens) / len(self.doc_lens) if self.doc_lens else 0.0
+
+    @classmethod
+    def build(cls, chunks, documents, point_id):
+        """Build from embed.py's chunk dicts and documents; ``point_id(source, index)`` gives the id."""
+        ids, meta, doc_lens = [], [], []
+        postings = defaultdict(lambda: ([], []))
+        for pos, chunk in enumerate(chunks):
+            tokens = tokenize(chunk["text"])
+            ids.append(point_id(chunk["source"], chunk["index"]))
+            chunk_meta = {"source": chunk["source"], **(chunk.get("metadata") or {})}
+            meta.append([chunk_meta.get(f) for f in cls.META_FIELDS])
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term][0].append(pos)
+                postings[term][1].append(tf)
+
+        citations = {}
+        for doc in documents:
+            instrument = instrument_for(doc["source"])
+            doc_type = (doc.get("metadata") or {}).get("doc_type")
+            if not instrument or doc_type not in (None, "legislation"):
+                continue
+            for key, text in extract_citations(doc["text"]).items():
+                full_key = f"{instrument}:{key}"
+                if len(text) > len(citations.get(full_key, {}).get("text", "")):
+                    citations[full_key] = {"text": text, "source": doc["source"], "metadata": doc.get("metadata") or {}}
+
+        return cls(ids, meta, doc_lens, {t: [p, f] for t, (p, f) in postings.items()}, citations)
+
+    def save(self, path=KEYWORD_INDEX_PATH):
+        data = {
+            "ids": self.ids,
+            "meta": self.meta,
+            "doc_lens": self.doc_lens,
+            "postings": self.postings,
+            "citations": self.citations,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path=KEYWORD_INDEX_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["meta"], data["doc_lens"], data["postings"], data["citations"])
+
+    def chunk_meta(self, pos):
+        return dict(zip(self.META_FIELDS, self.meta[pos]))
+
+    def lookup(self, instrument, kind, number):
+        """Exact citation text, e.g. lookup("GDPR", "article", 33); None if not indexed."""
+        return self.citations.get(f"{instrument}:{kind}:{number}")
+
+    def search(self, query, k=20, **filters):
+        """BM25 top-k as [(point id, score)], honouring the same filters as /ask."""
+        n = len(self.ids)
+        if not n:
+            return []
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            positions, tfs = posting
+            idf = math.log(1 + (n - len(positions) + 0.5) / (len(positions) + 0.5))
+            for pos, tf in zip(positions, tfs):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lens[pos] / self.avgdl)
+                scores[pos] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if any(filters.values()):
+            scores = {p: s for p, s in scores.items() if matches_filters(self.chunk_meta(p), **filters)}
+        top = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return [(self.ids[pos], score) for pos, score in top]
+
+
+def reciprocal_rank_fusion(*rankings, k=RRF_K):
+    """Fuse ranked id lists; returns [(id, fused score)] best first."""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            fused[str(item_id)] += 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
@@ -1,13 +1,18 @@
 from fastapi import FastAPI, Request, Form, Depends, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from qdrant_client import QdrantClient
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, Range
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 import os
 import google.generativeai as genai
 import numpy as np
+from metadata import REGULATORS, DOC_TYPES, JURISDICTIONS, document_metadata
+from admission import AdmissionController, Busy
+from keyword_index import KeywordIndex, KEYWORD_INDEX_PATH, parse_citation, reciprocal_rank_fusion, matches_filters
 
 # === Load environment variables ===
 load_dotenv()
@@ -16,6 +21,13 @@ QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 COLLECTION_NAME = "vdpo_documents"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+TOP_K = 5
+FUSION_CANDIDATES = 20  # dense and keyword hits considered before fusing down to TOP_K
+# /ask admission control, tune per replica
+ASK_MAX_CONCURRENT = int(os.getenv("ASK_MAX_CONCURRENT", "8"))
+ASK_MAX_PER_USER = int(os.getenv("ASK_MAX_PER_USER", "2"))
+ASK_MAX_QUEUE = int(os.getenv("ASK_MAX_QUEUE", "32"))
+ASK_QUEUE_TIMEOUT = float(os.getenv("ASK_QUEUE_TIMEOUT", "20"))
 
 # === Configure Gemini ===
 genai.configure(api_key=GEMINI_API_KEY)
@@ -30,10 +42,53 @@ templates = Jinja2Templates(directory="templates")
 qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
 embed_model = SentenceTransformer(EMBEDDING_MODEL)
 
+#Keyword + citation index built by embed.py (hybrid search is skipped without it)
+keyword_index = KeywordIndex.load(KEYWORD_INDEX_PATH) if os.path.exists(KEYWORD_INDEX_PATH) else None
+
+#Admission control for /ask
+admission = AdmissionController(
+    max_concurrent=ASK_MAX_CONCURRENT,
+    max_per_user=ASK_MAX_PER_USER,
+    max_queue=ASK_MAX_QUEUE,
+    queue_timeout=ASK_QUEUE_TIMEOUT,
+)
+
 #Dummy in-memory user DB
 VALID_USERS = {"admin": "admin123"}
 sessions = {}
 
+def clean_filters(regulator="", doc_type="", jurisdiction="", year_from=""):
+    """Search form values with unknown entries blanked out."""
+    return {
+        "regulator": regulator if regulator in REGULATORS else "",
+        "doc_type": doc_type if doc_type in DOC_TYPES else "",
+        "jurisdiction": jurisdiction if jurisdiction in JURISDICTIONS else "",
+        "year_from": year_from if str(year_from).strip().isdigit() else "",
+    }
+
+def build_filter(regulator="", doc_type="", jurisdiction="", year_from=""):
+    """Qdrant filter for the search form; unknown or empty values are ignored."""
+    conditions = []
+    for key, value, allowed in (
+        ("regulator", regulator, REGULATORS),
+        ("doc_type", doc_type, DOC_TYPES),
+        ("jurisdiction", jurisdiction, JURISDICTIONS),
+    ):
+        if value in allowed:
+            conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+    if str(year_from).strip().isdigit():
+        conditions.append(FieldCondition(key="year", range=Range(gte=int(year_from))))
+    return Filter(must=conditions) if conditions else None
+
+def filter_context(**selected):
+    """Template variables for the filter dropdowns."""
+    return {
+        "regulators": REGULATORS,
+        "doc_types": DOC_TYPES,
+        "jurisdictions": JURISDICTIONS,
+        "selected": selected,
+    }
+
 def get_current_user(request: Request):
     username = request.cookies.get("username")
     if not username or username not in sessions:
@@ -89,11 +144,10 @@ def logout(request: Request):
 #Home Page
 @app.get("/home", response_class=HTMLResponse)
 def home(request: Request, user: str = Depends(get_current_user)):
-    return templates.TemplateResponse("home.html", {"request": request, "user": user})
+    return templates.TemplateResponse("home.html", {"request": request, "user": user, **filter_context()})
 
-#Ask Endpoint
-@app.post("/ask", response_class=HTMLResponse)
-def ask(request: Request, question: str = Form(...), user: str = Depends(get_current_user)):
+def search_chunks(question, query_filter=None, limit=TOP_K):
+    """Embed the question and return the top hits from Qdrant. Blocking; run in the threadpool."""
     # create embedding (ensure convert to plain python list)
     emb = embed_model.encode([question])[0]
     if isinstance(emb, np.ndarray):
@@ -103,80 +157,157 @@ def ask(request: Request, question: str = Form(...), user: str = Depends(get_cur
         query_vector = list(map(float, emb))
 
     # Use query_points (modern Qdrant Client). Some older clients had `search` or `search_points`.
-    results = None
     try:
         # preferred modern API
         query_response = qdrant.query_points(
             collection_name=COLLECTION_NAME,
             query=query_vector,
-            limit=5,
+            query_filter=query_filter,
+            limit=limit,
             with_payload=True
         )
         # query_response typically contains .points (or .result depending on client version)
         if hasattr(query_response, "points"):
-            hits = query_response.points
+            return query_response.points
         elif hasattr(query_response, "result"):
-            hits = query_response.result
-        else:
-            # attempt to treat as iterable if shape differs
-            hits = list(query_response)
+            return query_response.result
+        # attempt to treat as iterable if shape differs
+        return list(query_response)
     except AttributeError:
         # fallback for older qdrant-client versions that might expose `search`
         if hasattr(qdrant, "search"):
-            hits = qdrant.search(
+            return qdrant.search(
                 collection_name=COLLECTION_NAME,
                 query_vector=query_vector,
-                limit=5,
+                query_filter=query_filter,
+                limit=limit,
                 with_payload=True
             )
-        else:
-            # re-raise with a helpful message if neither method exists
-            raise RuntimeError("Your installed qdrant-client doesn't expose `query_points` or `search`. "
-                               "Try upgrading/downgrading qdrant-client or check docs.") from None
-    except Exception as e:
-        # any other runtime error — surface to template
-        return templates.TemplateResponse("home.html", {
-            "request": request,
-            "user": user,
-            "question": question,
-            "answer": f"Error querying vector DB: {e}",
-            "sources": []
-        })
+        # re-raise with a helpful message if neither method exists
+        raise RuntimeError("Your installed qdrant-client doesn't expose `query_points` or `search`. "
+                           "Try upgrading/downgrading qdrant-client or check docs.") from None
+
+def retrieve(question, query_filter=None, filter_values=None):
+    """Dense hits, fused with BM25 keyword hits (reciprocal rank fusion) when the keyword index is loaded."""
+    if keyword_index is None:
+        return search_chunks(question, query_filter)
+
+    dense = search_chunks(question, query_filter, limit=FUSION_CANDIDATES)
+    keyword = keyword_index.search(question, k=FUSION_CANDIDATES, **(filter_values or {}))
+    fused = reciprocal_rank_fusion([h.id for h in dense], [pid for pid, _ in keyword])[:TOP_K]
 
-    # Build context and sources from hits (payload structure assumed: payload['text'], payload['source'])
+    by_id = {str(h.id): h for h in dense}
+    missing = [pid for pid, _ in fused if pid not in by_id]
+    if missing:
+        # keyword-only hits: fetch their payloads
+        for point in qdrant.retrieve(collection_name=COLLECTION_NAME, ids=missing, with_payload=True):
+            by_id[str(point.id)] = point
+    # keep the cosine score for dense hits; keyword-only hits only have their fused rank score
+    return [
+        {"payload": by_id[pid].payload, "score": getattr(by_id[pid], "score", None), "rank_score": score}
+        for pid, score in fused if pid in by_id
+    ]
+
+def build_context(hits):
+    """Context lines for the prompt and source lines for the template."""
+    # payload structure assumed: payload['text'], payload['source']
     context_chunks, sources = [], []
     for i, r in enumerate(hits, 1):
         payload = getattr(r, "payload", None) or (r.get("payload") if isinstance(r, dict) else {})
         score = getattr(r, "score", None) or (r.get("score") if isinstance(r, dict) else None)
+        rank_score = r.get("rank_score") if isinstance(r, dict) else None
         text = payload.get("text", "") if payload else ""
         src = payload.get("source", "") if payload else ""
+        tags = " · ".join(t for t in (payload.get("regulator"), payload.get("doc_type")) if t) if payload else ""
+        if tags:
+            src = f"{src} [{tags}]"
         context_chunks.append(f"{i}. {text}")
         if score is not None:
             sources.append(f"📄 {src} (score: {float(score):.4f})")
+        elif rank_score is not None:
+            sources.append(f"📄 {src} (rank score: {float(rank_score):.4f})")
         else:
             sources.append(f"📄 {src}")
+    return context_chunks, sources
 
+def generate_answer(question, context_chunks):
+    """Ask Gemini. Blocking; run in the threadpool."""
     prompt = f"""You are a Data Protection expert AI. Use the following document context to answer the user's question:\n\nCONTEXT:\n{chr(10).join(context_chunks)}\n\nQUESTION:\n{question}\n\nANSWER:"""
 
     try:
         response = gemini_model.generate_content(prompt)
         # Be robust to different shapes of Gemini output
         if hasattr(response, "text") and response.text:
-            answer = response.text.strip()
+            return response.text.strip()
         elif hasattr(response, "candidates"):
             # candidates -> list of candidate objects with 'content' or 'output'
             first = response.candidates[0]
-            answer = getattr(first, "content", getattr(first, "output", str(first))).strip()
-        else:
-            # fallback str()
-            answer = str(response).strip()
+            return getattr(first, "content", getattr(first, "output", str(first))).strip()
+        # fallback str()
+        return str(response).strip()
     except Exception as e:
-        answer = f"Error calling Gemini: {str(e)}"
-
-    return templates.TemplateResponse("home.html", {
-        "request": request,
-        "user": user,
-        "question": question,
-        "answer": answer,
-        "sources": sources
-    })
+        return f"Error calling Gemini: {str(e)}"
+
+#Ask Endpoint
+@app.post("/ask", response_class=HTMLResponse)
+async def ask(request: Request, question: str = Form(...), regulator: str = Form(""), doc_type: str = Form(""),
+              jurisdiction: str = Form(""), year_from: str = Form(""), user: str = Depends(get_current_user)):
+    filters = filter_context(regulator=regulator, doc_type=doc_type, jurisdiction=jurisdiction, year_from=year_from)
+    filter_values = clean_filters(regulator, doc_type, jurisdiction, year_from)
+    query_filter = build_filter(**filter_values)
+
+    def render(answer, sources, status_code=200, headers=None):
+        return templates.TemplateResponse("home.html", {
+            "request": request,
+            "user": user,
+            "question": question,
+            "answer": answer,
+            "sources": sources,
+            **filters
+        }, status_code=status_code, headers=headers)
+
+    # Citation fast path: "GDPR Article 33" / "Recital 47" answered from the index, no embed/Qdrant/Gemini
+    citation = parse_citation(question) if keyword_index else None
+    cited = keyword_index.lookup(*citation[:3]) if citation else None
+    if cited and not matches_filters(cited.get("metadata") or document_metadata(cited["source"]), **filter_values):
+        cited = None  # cited instrument is outside the selected filters
+    if cited:
+        instrument, kind, number, pure_lookup = citation
+        cited_label = f"{instrument} {kind.title()} {number}"
+        if pure_lookup:
+            return render(cited["text"], [f"📄 {cited['source']} [{cited_label}]"])
+
+    try:
+        async with admission.slot(user):
+            # don't spend embedding/Gemini time on clients that already gave up
+            if await request.is_disconnected():
+                admission.record_shed("client_gone")
+                return render("", [], status_code=499)
+
+            try:
+                hits = await run_in_threadpool(retrieve, question, query_filter, filter_values)
+            except Exception as e:
+                # any runtime error — surface to template
+                return render(f"Error querying vector DB: {e}", [])
+            context_chunks, sources = build_context(hits)
+            if cited:
+                # question mentions an article/recital: give Gemini its exact text too
+                context_chunks.insert(0, f"{cited_label}: {cited['text']}")
+                sources.insert(0, f"📄 {cited['source']} [{cited_label}]")
+
+            if await request.is_disconnected():
+                admission.record_shed("client_gone")
+                return render("", [], status_code=499)
+
+            answer = await run_in_threadpool(generate_answer, question, context_chunks)
+            return render(answer, sources)
+    except Busy as e:
+        status = 429 if e.reason == "per_user" else 503
+        message = ("⏳ You already have questions in progress. Please wait for them to finish."
+                   if e.reason == "per_user" else "⏳ PrivacyX is busy right now. Please retry in a few seconds.")
+        return render(message, [], status_code=status, headers={"Retry-After": str(e.retry_after)})
+
+#Admission stats (queue depth and shed counts, for sizing replicas)
+@app.get("/admission")
+async def admission_stats():
+    return admission.stats()
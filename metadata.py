@@ -0,0 +1,140 @@
+import os
+import re
+import json
+from urllib.parse import urlparse
+
+# Folders the fetchers write into; their download caches map files back to URLs
+SOURCE_DIRS = ["./", "./ico_pdfs", "./edps_pdfs", "./iapp_articles", "./gdpr_articles"]
+DOWNLOAD_CACHE = ".download_cache.json"
+
+REGULATORS = ["ICO", "EDPB", "EDPS", "EU", "IAPP"]
+JURISDICTIONS = ["UK", "EU", "International"]
+DOC_TYPES = [
+    "legislation", "guidelines", "guidance", "opinion", "recommendation", "statement",
+    "decision", "code", "impact assessment", "template", "report", "news", "other",
+]
+
+JURISDICTION_BY_REGULATOR = {
+    "ICO": "UK",
+    "EDPB": "EU",
+    "EDPS": "EU",
+    "EU": "EU",
+    "IAPP": "International",
+}
+
+# host substring -> regulator
+REGULATOR_BY_HOST = [
+    ("ico.org.uk", "ICO"),
+    ("edpb.europa.eu", "EDPB"),
+    ("edps.europa.eu", "EDPS"),
+    ("eur-lex.europa.eu", "EU"),
+    ("digital-strategy.ec.europa.eu", "EU"),
+    ("iapp.org", "IAPP"),
+]
+
+# origin folder name -> regulator
+REGULATOR_BY_FOLDER = {
+    "ico_pdfs": "ICO",
+    "edps_pdfs": "EDPS",
+    "iapp_articles": "IAPP",
+    "gdpr_articles": "EU",
+}
+
+# filename pattern -> regulator, checked last
+REGULATOR_BY_NAME = [
+    (re.compile(r"edpb|wp29|article29", re.I), "EDPB"),
+    (re.compile(r"edps", re.I), "EDPS"),
+    (re.compile(r"\bico\b|ico[-_]", re.I), "ICO"),
+    (re.compile(r"gdpr|nis2|regulation|directive|chapter", re.I), "EU"),
+]
+
+# filename pattern -> document type, first match wins
+DOC_TYPE_BY_NAME = [
+    (re.compile(r"gdpr_official|nis2_full_text|chapter|regulation|directive", re.I), "legislation"),
+    (re.compile(r"guideline", re.I), "guidelines"),
+    (re.compile(r"impact[-_ ]assessment", re.I), "impact assessment"),
+    (re.compile(r"opinion", re.I), "opinion"),
+    (re.compile(r"recommendation", re.I), "recommendation"),
+    (re.compile(r"statement", re.I), "statement"),
+    (re.compile(r"decision", re.I), "decision"),
+    (re.compile(r"code", re.I), "code"),
+    (re.compile(r"template|letter", re.I), "template"),
+    (re.compile(r"report|summary", re.I), "report"),
+    (re.compile(r"guid|at-a-glance", re.I), "guidance"),
+]
+
+DATE_PATTERNS = [
+    re.compile(r"(?<!\d)(?P<y>(?:19|20)\d{2})[-_]?(?P<m>0[1-9]|1[0-2])[-_]?(?P<d>0[1-9]|[12]\d|3[01])(?!\d)"),
+    re.compile(r"(?<!\d)(?P<y>(?:19|20)\d{2})[-_]?(?P<m>0[1-9]|1[0-2])(?!\d)"),
+    re.compile(r"(?<!\d)(?P<yy>\d{2})-(?P<m>0[1-9]|1[0-2])-(?P<d>0[1-9]|[12]\d|3[01])(?!\d)"),  # EDPS 21-01-12_
+    re.compile(r"(?<!\d)(?P<y>(?:19|20)\d{2})(?!\d)"),
+]
+
+
+def load_origins(dirs=SOURCE_DIRS):
+    """Map file stem -> origin (source URL from a download cache, else the folder it sits in)."""
+    origins = {}
+    for d in dirs:
+        if not os.path.isdir(d):
+            continue
+        for filename in os.listdir(d):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() in (".pdf", ".txt"):
+                origins.setdefault(stem, os.path.join(d, filename))
+        try:
+            with open(os.path.join(d, DOWNLOAD_CACHE), "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for url, entry in cache.items():
+            origins[os.path.splitext(entry.get("path", ""))[0]] = url
+    return origins
+
+
+def infer_regulator(source, origin=None):
+    if origin:
+        host = urlparse(origin).netloc.lower()
+        for needle, regulator in REGULATOR_BY_HOST:
+            if needle in host:
+                return regulator
+        folder = os.path.basename(os.path.dirname(os.path.normpath(origin)))
+        if folder in REGULATOR_BY_FOLDER:
+            return REGULATOR_BY_FOLDER[folder]
+    for pattern, regulator in REGULATOR_BY_NAME:
+        if pattern.search(source):
+            return regulator
+    return None
+
+
+def infer_doc_type(source, regulator=None):
+    for pattern, doc_type in DOC_TYPE_BY_NAME:
+        if pattern.search(source):
+            return doc_type
+    return "news" if regulator == "IAPP" else "other"
+
+
+def infer_date(source):
+    """ISO date (missing month/day default to 01) parsed from the filename, or None."""
+    for pattern in DATE_PATTERNS:
+        m = pattern.search(source)
+        if not m:
+            continue
+        parts = m.groupdict()
+        year = int(parts["y"]) if parts.get("y") else 2000 + int(parts["yy"])
+        month = int(parts.get("m") or 1)
+        day = int(parts.get("d") or 1)
+        return f"{year:04d}-{month:02d}-{day:02d}"
+    return None
+
+
+def document_metadata(source, origin=None):
+    """Structured payload fields for a document: regulator, doc_type, date, year, jurisdiction."""
+    regulator = infer_regulator(source, origin)
+    date = infer_date(source)
+    return {
+        "regulator": regulator,
+        "doc_type": infer_doc_type(source, regulator),
+        "date": date,
+        "year": int(date[:4]) if date else None,
+        "jurisdiction": JURISDICTION_BY_REGULATOR.get(regulator),
+    }
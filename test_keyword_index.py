@@ -0,0 +1,66 @@
+from keyword_index import extract_citations, parse_citation
+
+# Two pages of an Official Journal print, trimmed: recital (3) runs across the
+# page break, below the page-1 footnotes, and Article 2 wraps a reference to
+# "Article 9" onto a line of its own.
+GDPR_EXCERPT = """\
+Having regard to the opinion of the European Economic and Social Committee (1),
+Whereas:
+(1) The protection of natural persons in relation to the processing of personal data is a fundamental right.
+(2) The principles of, and rules on the protection of natural persons with regard to the processing of their
+personal data should respect their fundamental rights and freedoms.
+(3) Directive 95/46/EC of the European Parliament and of the Council (4) seeks to harmonise the protection of
+(1) OJ C 229, 31.7.2012, p. 90.
+(2) OJ C 391, 18.12.2012, p. 127.
+(4) Directive 95/46/EC of the European Parliament and of the Council of 24 October 1995 (OJ L 281, 23.11.1995, p. 31).
+4.5.2016 EN Official Journal of the European Union L 119/1
+L 119/2 EN Official Journal of the European Union 4.5.2016
+fundamental rights and freedoms of natural persons in respect of processing activities.
+(4) The processing of personal data should be designed to serve mankind.
+HAVE ADOPTED THIS REGULATION:
+CHAPTER I
+General provisions
+Article 1
+Subject-matter and objectives
+1. This Regulation lays down rules relating to the protection of natural persons.
+Article 2
+Material scope
+1. This Regulation applies to the processing of personal data wholly or partly by automated means.
+2. This Regulation does not apply to the processing of special categories of data referred to in
+Article 9
+where the conditions of that provision are met.
+Article 3
+Territorial scope
+1. This Regulation applies to the processing of personal data in the context of an establishment.
+"""
+
+
+def test_recital_spanning_a_page_keeps_its_continuation():
+    citations = extract_citations(GDPR_EXCERPT)
+    recital = citations["recital:3"]
+    assert recital.endswith("in respect of processing activities.")
+    assert "harmonise the protection of\nfundamental rights" in recital
+    assert "OJ C 229" not in recital
+    assert "Official Journal" not in recital
+    assert citations["recital:4"].startswith("(4) The processing of personal data")
+    assert sorted(k for k in citations if k.startswith("recital:")) == [f"recital:{n}" for n in range(1, 5)]
+
+
+def test_wrapped_article_reference_does_not_end_the_article():
+    citations = extract_citations(GDPR_EXCERPT)
+    assert "article:9" not in citations
+    assert citations["article:2"].endswith("where the conditions of that provision are met.")
+    assert citations["article:3"].startswith("Article 3\nTerritorial scope")
+    assert citations["article:1"].startswith("Article 1\nSubject-matter")
+
+
+def test_bare_article_in_a_question_needs_an_instrument():
+    assert parse_citation("article 6(1)(f) of the GDPR") == ("GDPR", "article", 6, True)
+    assert parse_citation("Article 33") == ("GDPR", "article", 33, True)
+    assert parse_citation("What does NIS2 Article 21 require?") == ("NIS2", "article", 21, False)
+    assert parse_citation("How does Article 6 apply to cookies?") is None
+
+
+def test_article_29_working_party_is_not_a_citation():
+    assert parse_citation("What does the Article 29 Working Party say about consent?") is None
+    assert parse_citation("Article 29 WP guidelines on consent") is None